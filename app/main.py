@@ -1,37 +1,80 @@
-from fastapi import FastAPI, HTTPException, Body
+from fastapi import FastAPI, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, RedirectResponse, Response
 from fastapi.staticfiles import StaticFiles
+from pydantic import BaseModel
 
-from typing import Dict, List, Any, Optional
+from typing import Dict, Iterator, List, Any, Optional, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import lru_cache
+from dataclasses import dataclass
 from pathlib import Path
-import random, re, uuid
+from sys import intern
+from urllib.parse import quote
+import hashlib, logging, os, pickle, re, stat, threading, time, uuid
 
+import orjson
 from openpyxl import load_workbook
 
+try:  # optional Rust-backed xlsx reader; openpyxl is the fallback
+    from python_calamine import CalamineWorkbook
+except ImportError:
+    CalamineWorkbook = None
+
 
 # =============================================================================
 # App setup
 # =============================================================================
-app = FastAPI(title="AI Maths Prep API", version="0.1.0")
+logger = logging.getLogger(__name__)
+
+app = FastAPI(title="AI Maths Prep API", version="0.1.0", default_response_class=ORJSONResponse)
 
-# CORS (open for dev; restrict in production)
+# CORS: set CORS_ORIGINS (comma-separated) and/or CORS_ORIGIN_REGEX (e.g. for local dev
+# ports) in production. With neither, any origin is allowed but credentials are off, so
+# the middleware never echoes the request Origin.
+CORS_ORIGINS = [o.strip() for o in os.environ.get("CORS_ORIGINS", "").split(",") if o.strip()]
+CORS_ORIGIN_REGEX = os.environ.get("CORS_ORIGIN_REGEX", "").strip() or None
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
+    allow_origins=CORS_ORIGINS or ([] if CORS_ORIGIN_REGEX else ["*"]),
+    allow_origin_regex=CORS_ORIGIN_REGEX,
+    allow_credentials=bool(CORS_ORIGINS or CORS_ORIGIN_REGEX),
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
+class _APIGZipMiddleware(GZipMiddleware):
+    """Compress API responses; static PDFs are skipped so they stream straight from disk."""
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith("/static/"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+app.add_middleware(_APIGZipMiddleware, minimum_size=500)
+
 # Data roots (relative to this file)
 APP_DIR = Path(__file__).parent
 TUTORIALS_DIR = APP_DIR / "data" / "tutorials"
 QUIZZES_DIR   = APP_DIR / "data" / "quizzes"
+TUTORIALS_ROOT = TUTORIALS_DIR.resolve()   # resolved once; handlers never call resolve()
 
-# Serve tutorials as static files (so Streamlit can embed PDFs reliably)
-APP_DIR = Path(__file__).parent
-app.mount("/static", StaticFiles(directory=APP_DIR / "data"), name="static")
+# Each subject has a tutorials/<subject>/ folder and a quizzes/<subject>.xlsx workbook
+SUBJECTS: frozenset = frozenset({"LA", "Stats"})
+
+class _CachedStaticFiles(StaticFiles):
+    """StaticFiles that lets clients keep files for a day; ETag/304 handling is inherited."""
+    def file_response(self, *args, **kwargs):
+        response = super().file_response(*args, **kwargs)
+        response.headers["Cache-Control"] = "public, max-age=86400"
+        return response
 
+# Serve tutorials as static files (so Streamlit can embed PDFs reliably).
+# Only the tutorials tree is exposed; quiz workbooks (answer keys) stay private.
+app.mount("/static/tutorials", _CachedStaticFiles(directory=TUTORIALS_DIR), name="tutorials")
 
 
 # =============================================================================
@@ -45,6 +88,13 @@ def healthz():
 # =============================================================================
 # Tutorials
 # =============================================================================
+def _plain_name(part: str) -> bool:
+    # a single path component: no separators or dot-dirs, so joins stay under TUTORIALS_ROOT
+    return bool(part) and part not in (".", "..") and "/" not in part and "\\" not in part
+
+# Listing cache: {subject: (dir mtime_ns, encoded JSON body)}; re-scanned only when the dir changes
+_TUTORIALS_CACHE: Dict[str, Tuple[int, bytes]] = {}
+
 @app.get("/tutorials_list")
 def tutorials_list(subject: str):
     """
@@ -52,35 +102,41 @@ def tutorials_list(subject: str):
     Response: [{ "filename": "...pdf", "title": "1.1 Intro to ..."}]
     """
     subject = subject.strip()
-    subject_dir = TUTORIALS_DIR / subject
-    if not subject_dir.exists() or not subject_dir.is_dir():
+    if subject not in SUBJECTS:
+        raise HTTPException(status_code=404, detail=f"Subject not found: {subject}")
+    subject_dir = TUTORIALS_ROOT / subject
+    try:
+        st = subject_dir.stat()
+    except OSError:
+        st = None
+    if st is None or not stat.S_ISDIR(st.st_mode):
         raise HTTPException(status_code=404, detail=f"Subject not found: {subject}")
+    cached = _TUTORIALS_CACHE.get(subject)
+    if cached and cached[0] == st.st_mtime_ns:
+        return Response(cached[1], media_type="application/json")
 
-    files = sorted([p.name for p in subject_dir.glob("*.pdf")])
+    with os.scandir(subject_dir) as it:
+        files = sorted(e.name for e in it if e.name.endswith(".pdf") and e.is_file())
     items: List[Dict[str, Any]] = []
     for name in files:
-        title = name[:-4].replace("_", " ").replace("-", " ").strip()  # drop .pdf
+        title = name.removesuffix(".pdf").replace("_", " ").replace("-", " ").strip()
         items.append({"filename": name, "title": title, "subject": subject})
-    return items
+    body = orjson.dumps(items)
+    _TUTORIALS_CACHE[subject] = (st.st_mtime_ns, body)
+    return Response(body, media_type="application/json")
 
 
 @app.get("/tutorials_file")
-def tutorials_file(subject: str, filename: str):
-    subject_dir = TUTORIALS_DIR / subject
-    file_path = subject_dir / filename
-    if not file_path.exists():
+async def tutorials_file(subject: str, filename: str):
+    if subject not in SUBJECTS or not _plain_name(filename):
         raise HTTPException(status_code=404, detail="Tutorial file not found")
-    return {"url": f"/static/tutorials/{subject}/{filename}"}
+    # hand the client straight to the /static mount, which 404s on missing files itself
+    return RedirectResponse(f"/static/tutorials/{subject}/{quote(filename)}", status_code=307)
 
 
-# =============================================================================
-# =============================================================================
 # =============================================================================
 # Quiz Engine (Excel-backed, step-based, deterministic finish)
 # =============================================================================
-from pydantic import BaseModel
-import uuid
-
 class QuizStart(BaseModel):
     subject: str   # "LA" | "Stats"
     topic: str     # "1.1" or "1.1_Intro_to_Vectors"
@@ -89,164 +145,403 @@ class QuizAnswer(BaseModel):
     session_id: str
     answer: int    # 0..3
 
-# In-memory sessions (MVP)
-_SESSIONS: Dict[str, Dict[str, Any]] = {}
-
+@dataclass(slots=True)
+class QuizSession:
+    # immutable info
+    subject: str
+    sheet: str
+    pools: "Bank"                 # the sheet's shared pools
+    cursors: Dict[str, int]       # next unused index per difficulty
+    # progress
+    step: int = 1                 # absolute step 1..8
+    score: int = 0                # total correct so far
+    p1_correct: int = 0           # correct among first 5
+    q6_correct: Optional[bool] = None
+    q7_correct: Optional[bool] = None
+    # current question
+    current: Optional["Question"] = None
+    touched: float = 0.0          # time.monotonic() of last access
+
+# In-memory sessions (MVP): kept in LRU order, capped, and dropped after an idle TTL
+_SESSIONS: "OrderedDict[str, QuizSession]" = OrderedDict()
+_SESSIONS_MAX = 10_000
+_SESSION_TTL = 60 * 60   # seconds a session may sit idle
+_SESSIONS_LOCK = threading.Lock()
+
+def _session_put(sid: str, s: QuizSession) -> None:
+    now = time.monotonic()
+    s.touched = now
+    with _SESSIONS_LOCK:
+        _SESSIONS[sid] = s
+        # oldest-touched first: drop expired heads, then trim to the cap
+        while _SESSIONS:
+            head = next(iter(_SESSIONS.values()))
+            if now - head.touched <= _SESSION_TTL and len(_SESSIONS) <= _SESSIONS_MAX:
+                break
+            _SESSIONS.popitem(last=False)
+
+def _session_get(sid: str) -> Optional[QuizSession]:
+    now = time.monotonic()
+    with _SESSIONS_LOCK:
+        s = _SESSIONS.get(sid)
+        if s is None:
+            return None
+        if now - s.touched > _SESSION_TTL:
+            del _SESSIONS[sid]
+            return None
+        s.touched = now
+        _SESSIONS.move_to_end(sid)
+        return s
+
+_TOPIC_RE = re.compile(r"(\d+)\.(\d+)")
+
+@lru_cache(maxsize=256)   # clients send the same handful of topics over and over
 def _sheet_key(topic: str) -> str:
-    m = re.search(r"(\d+)\.(\d+)", topic or "")
-    return f"{int(m.group(1))}.{int(m.group(2))}" if m else str(topic or "").strip()
-
-def _load_questions(subject: str, sheet: str) -> List[Dict[str, Any]]:
-    xlsx = QUIZZES_DIR / f"{subject}.xlsx"
-    if not xlsx.exists():
-        raise HTTPException(status_code=400, detail=f"Workbook not found: {xlsx}")
-    wb = load_workbook(filename=str(xlsx), read_only=True, data_only=True)
-    if sheet not in wb.sheetnames:
-        avail = ", ".join(wb.sheetnames)
+    # topic is always a str (validated by QuizStart); sheets are named "1.1", "2.4", ...
+    m = _TOPIC_RE.search(topic)
+    return m.group(0) if m else topic.strip()
+
+def _calamine_cell(v):
+    # match openpyxl: calamine reports blank cells as "" (openpyxl: None) and
+    # whole numbers as floats (openpyxl: ints, so "5" stays "5")
+    if v == "": return None
+    return int(v) if isinstance(v, float) and v.is_integer() else v
+
+@contextmanager
+def _open_workbook(xlsx: Path):
+    """Yield (sheet names, rows(sheet)) for a workbook; rows start with the header."""
+    if CalamineWorkbook is not None:
+        wb = CalamineWorkbook.from_path(str(xlsx))
+        def rows(sheet: str):
+            for r in wb.get_sheet_by_name(sheet).iter_rows():
+                yield tuple(_calamine_cell(v) for v in r)
+        try:
+            yield list(wb.sheet_names), rows
+        finally:
+            wb.close()
+        return
+    # Stream cells; skip formula evaluation and external-link parsing
+    wb = load_workbook(filename=str(xlsx), read_only=True, data_only=True, keep_links=False)
+    def rows(sheet: str):
+        ws = wb[sheet]
+        # don't trust the declared <dimension>: some writers claim 1,048,576 rows
+        ws.reset_dimensions()
+        return ws.iter_rows(values_only=True)
+    try:
+        yield wb.sheetnames, rows
+    finally:
         wb.close()
-        raise HTTPException(status_code=400, detail=f"Sheet '{sheet}' missing in {xlsx.name}; have: {avail}")
-    ws = wb[sheet]
-    hdr = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
+
+@dataclass(frozen=True, slots=True)
+class Question:
+    correct: int              # index of the right option, 0..3 (server-side only)
+    payload: Dict[str, Any]   # client-facing view, returned as-is: text, options, difficulty
+
+# A bank is a sheet's questions bucketed by difficulty, in sheet order:
+# {"easy": (...), "medium": (...), "hard": (...)}. Tuples: shared read-only by every session.
+Bank = Dict[str, Tuple[Question, ...]]
+
+# Parsed question banks: {(subject, sheet): bank} (filled at startup)
+_QUESTION_CACHE: Dict[Tuple[str, str], Bank] = {}
+# Workbook mtime_ns each subject's banks were parsed from; a change triggers a reload
+_BANK_MTIME: Dict[str, int] = {}
+# Every sheet name in each subject's workbook, parseable or not (answers "missing sheet" from memory)
+_SHEET_NAMES: Dict[str, Tuple[str, ...]] = {}
+# Why each unparseable sheet failed, per subject: {sheet: detail}; refreshed with the banks
+_SHEET_ERRORS: Dict[str, Dict[str, str]] = {}
+# Serialises workbook (re)loads per subject
+_LOAD_LOCKS: Dict[str, threading.Lock] = {s: threading.Lock() for s in SUBJECTS}
+
+# "Correct Answer" cells: a letter, or the option's 0-based index as text
+_LETTER_MAP = {"A": 0, "B": 1, "C": 2, "D": 3, "a": 0, "b": 1, "c": 2, "d": 3,
+               "0": 0, "1": 1, "2": 2, "3": 3}
+
+# "Difficulty" cells by first letter ("Easy", "e", "medium", ...); anything else is hard
+_DIFF_MAP = {"e": "easy", "E": "easy", "m": "medium", "M": "medium"}
+
+def _cidx(raw, options: Tuple[str, ...]) -> int:
+    # map a "Correct Answer" cell to an option index; anything unrecognised grades as A
+    if raw is None: return 0
+    if type(raw) is int and 0 <= raw <= 3:
+        return raw   # other ints fall through: a negative number can be an option's text
+    s = raw.strip() if isinstance(raw, str) else str(raw).strip()
+    i = _LETTER_MAP.get(s)
+    if i is not None: return i
+    if s.isdigit():
+        i = int(s);  return i if 0 <= i <= 3 else 0
+    try:
+        return options.index(s)   # the cell repeats an option's text
+    except ValueError:
+        return 0
+
+# Consecutive rows without question text after which the rest of a sheet is ignored
+_MAX_EMPTY_ROWS = 32
+
+def _parse_sheet(rows: Iterator[tuple], sheet: str) -> Bank:
+    hdr = next(rows, ())
     cols = {(str(c).strip().lower() if c else ""): i for i, c in enumerate(hdr)}
     need = ["question text","option a","option b","option c","option d","correct answer","difficulty"]
     miss = [c for c in need if c not in cols]
     if miss:
-        wb.close()
         raise HTTPException(status_code=400, detail=f"Missing columns {miss} in sheet '{sheet}'")
-    def cidx(raw, options):
-        if raw is None: return 0
-        s = str(raw).strip()
-        if s.isdigit():
-            i = int(s);  return i if 0 <= i <= 3 else 0
-        L = {"A":0,"B":1,"C":2,"D":3}
-        if s.upper() in L: return L[s.upper()]
-        for i,o in enumerate(options):
-            if s == str(o): return i
-        return 0
-    out = []
-    for row in ws.iter_rows(min_row=2, values_only=True):
-        qtext = row[cols["question text"]]
-        if not qtext: continue
-        opts = [row[cols["option a"]], row[cols["option b"]], row[cols["option c"]], row[cols["option d"]]]
-        opts = ["" if o is None else str(o) for o in opts]
-        corr = cidx(row[cols["correct answer"]], opts)
-        diff = str(row[cols["difficulty"]] or "").strip().lower()
-        diff = "easy" if diff.startswith("e") else "medium" if diff.startswith("m") else "hard"
-        out.append({"text": str(qtext), "options": opts, "correct": corr, "difficulty": diff})
-    wb.close()
-    if not out:
+    # resolve column positions once, outside the row loop
+    i_text, i_a, i_b, i_c, i_d, i_corr, i_diff = (cols[c] for c in need)
+    pools: Dict[str, List[Question]] = {"easy": [], "medium": [], "hard": []}
+    width = max(i_text, i_a, i_b, i_c, i_d, i_corr, i_diff) + 1
+    empty = 0
+    for row in rows:
+        if len(row) < width:   # trailing blank cells may be omitted
+            row = (*row, *(None,) * (width - len(row)))
+        qtext = row[i_text]
+        if not qtext:
+            empty += 1
+            if empty > _MAX_EMPTY_ROWS: break   # formatted-but-blank tail: stop scanning
+            continue
+        empty = 0
+        # interned: distractors repeat across questions and sheets, keep one copy of each
+        opts = tuple("" if o is None else intern(str(o)) for o in (row[i_a], row[i_b], row[i_c], row[i_d]))
+        corr = _cidx(row[i_corr], opts)
+        diff = row[i_diff]
+        diff = _DIFF_MAP.get((diff if isinstance(diff, str) else str(diff or "")).lstrip()[:1], "hard")
+        pools[diff].append(Question(corr, {"text": str(qtext), "options": opts, "difficulty": diff}))
+    if not any(pools.values()):
         raise HTTPException(status_code=400, detail="No questions found")
-    return out
-
-def _pop_from_pool(pools: Dict[str, List[Dict[str,Any]]], want: str) -> Dict[str,Any]:
-    # pop from preferred pool, else fall back to any non-empty pool
-    want = want.lower()
-    order = {"hard":["hard","medium","easy"], "medium":["medium","easy","hard"], "easy":["easy","medium","hard"]}[want]
-    for d in order:
-        if pools[d]:
-            return pools[d].pop(0)
+    return {d: tuple(qs) for d, qs in pools.items()}
+
+def _current_mtime(subject: str) -> Optional[int]:
+    """mtime_ns of a subject's workbook; None for an unknown subject or a missing file."""
+    if subject not in SUBJECTS:
+        return None
+    try:
+        return (QUIZZES_DIR / f"{subject}.xlsx").stat().st_mtime_ns
+    except OSError:
+        return None
+
+def _cached_questions(subject: str, sheet: str) -> Optional[Bank]:
+    """The cached bank if it is still current, else None (the caller falls back to _load_questions)."""
+    mtime = _current_mtime(subject)
+    if mtime is None or _BANK_MTIME.get(subject) != mtime:
+        return None
+    return _QUESTION_CACHE.get((subject, sheet))
+
+def _load_questions(subject: str, sheet: str) -> Bank:
+    if subject not in SUBJECTS:
+        raise HTTPException(status_code=400, detail=f"Unknown subject: {subject}")
+    xlsx = QUIZZES_DIR / f"{subject}.xlsx"
+    mtime = _current_mtime(subject)
+    if mtime is None:
+        raise HTTPException(status_code=400, detail=f"Workbook not found: {xlsx}")
+    if _BANK_MTIME.get(subject) != mtime:
+        # never loaded, or edited since: parse every sheet in one open, not just this one.
+        # One thread parses; concurrent misses wait and then find it done.
+        with _LOAD_LOCKS[subject]:
+            if _BANK_MTIME.get(subject) != mtime:
+                _load_subject(subject)
+    cached = _QUESTION_CACHE.get((subject, sheet))
+    if cached is not None:
+        return cached
+    names = _SHEET_NAMES.get(subject, ())
+    if sheet not in names:
+        # topic is client input: answer from memory, never by reopening the workbook
+        avail = ", ".join(names)
+        raise HTTPException(status_code=400, detail=f"Sheet '{sheet}' missing in {xlsx.name}; have: {avail}")
+    # the sheet exists but didn't parse: report the error recorded at load time
+    detail = _SHEET_ERRORS.get(subject, {}).get(sheet, f"Sheet '{sheet}' could not be parsed")
+    raise HTTPException(status_code=400, detail=detail)
+
+# Parsed banks are also pickled per workbook, so restarts skip the xlsx parse.
+# Pickles are keyed on this module's source, so any parser change invalidates them.
+QUIZ_CACHE_DIR = QUIZZES_DIR / ".cache"
+_PARSER_DIGEST = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=16).hexdigest()
+
+# What a workbook pickle holds: (all sheet names, {sheet: bank} for the sheets that parsed,
+# {sheet: error detail} for the ones that didn't)
+Workbook = Tuple[Tuple[str, ...], Dict[str, Bank], Dict[str, str]]
+
+def _bank_cache_path(xlsx: Path, st: os.stat_result) -> Path:
+    # the reader is part of the key: calamine and openpyxl need not yield identical rows
+    reader = "calamine" if CalamineWorkbook is not None else "openpyxl"
+    key = f"{_PARSER_DIGEST}:{reader}:{xlsx.name}:{st.st_size}:{st.st_mtime_ns}"
+    digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+    return QUIZ_CACHE_DIR / f"{xlsx.stem}-{digest}.pkl"
+
+def _read_bank_cache(path: Path) -> Optional[Workbook]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except Exception:
+        return None   # missing, stale or unreadable: reparse the workbook
+
+def _write_bank_cache(path: Path, wb: Workbook) -> None:
+    try:
+        path.parent.mkdir(exist_ok=True)
+        stem = path.name.rsplit("-", 1)[0]
+        for old in path.parent.glob("*.pkl"):   # drop pickles of older workbook versions
+            if old.name.rsplit("-", 1)[0] == stem:
+                old.unlink(missing_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(wb, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        pass   # read-only deploy: the in-memory cache still works
+
+def _load_subject(subject: str) -> None:
+    """(Re)fill _QUESTION_CACHE with every sheet of a subject's workbook."""
+    xlsx = QUIZZES_DIR / f"{subject}.xlsx"
+    try:
+        st = xlsx.stat()
+    except OSError:
+        return
+    cache_path = _bank_cache_path(xlsx, st)
+    cached = _read_bank_cache(cache_path)
+    if cached is not None:
+        names, banks, errors = cached
+    else:
+        # One open per workbook; every sheet parsed in the same pass. A bad sheet only
+        # takes itself out: its error is kept and reported to requests for that topic.
+        banks, errors = {}, {}
+        with _open_workbook(xlsx) as (names, rows):
+            names = tuple(names)
+            for sheet in names:
+                try:
+                    banks[sheet] = _parse_sheet(rows(sheet), sheet)
+                except HTTPException as e:
+                    errors[sheet] = e.detail
+                except Exception as e:
+                    logger.exception("Could not parse sheet %r of %s", sheet, xlsx.name)
+                    errors[sheet] = f"Could not parse sheet '{sheet}': {e}"
+        _write_bank_cache(cache_path, (names, banks, errors))
+    for key in [k for k in _QUESTION_CACHE if k[0] == subject]:
+        del _QUESTION_CACHE[key]
+    for sheet, qs in banks.items():
+        _QUESTION_CACHE[(subject, sheet)] = qs
+    _SHEET_NAMES[subject] = names
+    _SHEET_ERRORS[subject] = errors
+    _BANK_MTIME[subject] = st.st_mtime_ns
+
+def _preload_questions() -> None:
+    for subject in sorted(SUBJECTS):
+        try:
+            _load_subject(subject)
+        except Exception:
+            # a broken workbook must not stop the API; /quiz/start reports it per request
+            logger.exception("Could not preload question bank for %s", subject)
+
+@app.on_event("startup")
+def _warm_question_cache():
+    _preload_questions()
+
+# Pools to try, in order, for each wanted difficulty
+_DIFF_ORDER = {"hard": ("hard", "medium", "easy"),
+               "medium": ("medium", "easy", "hard"),
+               "easy": ("easy", "medium", "hard")}
+
+def _next_from_pool(pools: Bank, cursors: Dict[str, int], want: str) -> Question:
+    # take the next unused question from the preferred pool, else fall back to any pool with some left
+    for d in _DIFF_ORDER[want]:
+        i = cursors[d]
+        if i < len(pools[d]):
+            cursors[d] = i + 1
+            return pools[d][i]
     raise HTTPException(status_code=400, detail="Question bank exhausted")
 
 def _status_after_phase1(score5: int) -> str:
     return "Ready for next" if score5 >= 3 else "Review & retry"
 
+_PHASE2_STATUS = {(6, 5): "Confident", (7, 6): "Proficient", (8, 7): "Master", (8, 8): "Champion"}
+
 def _status_after_phase2(total: int, score: int) -> str:
-    if total == 6 and score == 5: return "Confident"
-    if total == 7 and score == 6: return "Proficient"
-    if total == 8 and score == 7: return "Master"
-    if total == 8 and score == 8: return "Champion"
-    return "Great progress"
+    return _PHASE2_STATUS.get((total, score), "Great progress")
+
+# Every finishing response minus "correct", built once: {(total, score): body}.
+# Phase 1 ends at 5 questions with score < 5; phase 2 always runs to 8.
+_FINISH: Dict[Tuple[int, int], Dict[str, Any]] = {
+    **{(5, n): {"done": True, "total": 5, "score": n,
+                "unlock_next": n >= 3, "status": _status_after_phase1(n)} for n in range(5)},
+    **{(8, n): {"done": True, "total": 8, "score": n,
+                "unlock_next": True, "status": _status_after_phase2(8, n)} for n in range(9)},
+}
 
 @app.post("/quiz/start")
-def quiz_start(req: QuizStart):
+async def quiz_start(req: QuizStart):
     sheet = _sheet_key(req.topic)
-    all_qs = _load_questions(req.subject, sheet)
-    # Build FIFO pools so we never repeat a question
-    pools = {"easy":[], "medium":[], "hard":[]}
-    for q in all_qs:
-        pools[q["difficulty"]].append(q)
+    # warm banks are served on the event loop; only a miss (which parses the workbook)
+    # is sent to the threadpool, so cold loads don't queue behind cached topics
+    pools = _cached_questions(req.subject, sheet)
+    if pools is None:
+        pools = await run_in_threadpool(_load_questions, req.subject, sheet)
+    # FIFO over the sheet's shared pools so we never repeat a question; the
+    # session only advances a per-difficulty cursor, pools are never copied
+    cursors = {"easy": 0, "medium": 0, "hard": 0}
 
     sid = str(uuid.uuid4())
-    _SESSIONS[sid] = {
-        # immutable info
-        "subject": req.subject, "sheet": sheet, "pools": pools,
-        # progress
-        "step": 1,             # absolute step 1..8
-        "score": 0,            # total correct so far
-        "p1_correct": 0,       # correct among first 5
-        "q6_correct": None,    # correctness of Q6
-        "q7_correct": None,    # correctness of Q7
-        # current question
-        "current": None,
-    }
+    s = QuizSession(subject=req.subject, sheet=sheet, pools=pools, cursors=cursors)
     # Step 1 difficulty: Easy
-    q = _pop_from_pool(pools, "easy")
-    _SESSIONS[sid]["current"] = q
+    q = _next_from_pool(pools, cursors, "easy")
+    s.current = q
+    _session_put(sid, s)
     return {"session_id": sid,
-            "question": {"text": q["text"], "options": q["options"], "difficulty": q["difficulty"]},
+            "question": q.payload,
             "done": False}
 
-@app.post("/quiz/answer")
-def quiz_answer(req: QuizAnswer):
-    s = _SESSIONS.get(req.session_id)
-    if not s: raise HTTPException(status_code=400, detail="Invalid session_id")
-    q = s.get("current")
+def _advance(s: QuizSession, answer: int) -> Dict[str, Any]:
+    """Grade `answer` against the session's current question and move it one step on."""
+    q = s.current
     if not q: raise HTTPException(status_code=400, detail="No current question")
 
     # grade this step
-    correct = (int(req.answer) == int(q["correct"]))
-    if correct: s["score"] += 1
+    correct = (answer == q.correct)   # both ints: validated by QuizAnswer / parsed at load
+    if correct: s.score += 1
 
     # --- If in steps 1..5 (Phase 1) ---
-    if 1 <= s["step"] <= 5:
-        if correct: s["p1_correct"] += 1
-        s["step"] += 1
-        if s["step"] <= 5:
+    if 1 <= s.step <= 5:
+        if correct: s.p1_correct += 1
+        s.step += 1
+        if s.step <= 5:
             # next P1 difficulty: step 2 -> Easy, steps 3..5 -> Medium
-            next_diff = "easy" if s["step"] <= 2 else "medium"
-            nq = _pop_from_pool(s["pools"], next_diff)
-            s["current"] = nq
+            next_diff = "easy" if s.step <= 2 else "medium"
+            nq = _next_from_pool(s.pools, s.cursors, next_diff)
+            s.current = nq
             return {"correct": correct, "done": False,
-                    "question": {"text": nq["text"], "options": nq["options"], "difficulty": nq["difficulty"]}}
+                    "question": nq.payload}
         # completed 5
-        if s["p1_correct"] < 5:
-            unlock = (s["p1_correct"] >= 3)
-            s["current"] = None
-            return {"correct": correct, "done": True,
-                    "total": 5, "score": s["score"],
-                    "unlock_next": unlock,
-                    "status": _status_after_phase1(s["p1_correct"])}
+        if s.p1_correct < 5:
+            s.current = None
+            return {"correct": correct, **_FINISH[(5, s.p1_correct)]}
         # perfect 5 → go to step 6
-        s["step"] = 6
-        nq = _pop_from_pool(s["pools"], "hard")   # Q6 Hard
-        s["current"] = nq
+        s.step = 6
+        nq = _next_from_pool(s.pools, s.cursors, "hard")   # Q6 Hard
+        s.current = nq
         return {"correct": correct, "done": False,
-                "question": {"text": nq["text"], "options": nq["options"], "difficulty": nq["difficulty"]}}
+                "question": nq.payload}
 
     # --- Steps 6..8 (Phase 2) ---
-    if s["step"] == 6:
-        s["q6_correct"] = correct
-        s["step"] = 7
+    if s.step == 6:
+        s.q6_correct = correct
+        s.step = 7
         next_diff = "hard" if correct else "medium"   # Q7
-        nq = _pop_from_pool(s["pools"], next_diff)
-        s["current"] = nq
+        nq = _next_from_pool(s.pools, s.cursors, next_diff)
+        s.current = nq
         return {"correct": correct, "done": False,
-                "question": {"text": nq["text"], "options": nq["options"], "difficulty": nq["difficulty"]}}
+                "question": nq.payload}
 
-    if s["step"] == 7:
-        s["q7_correct"] = correct
-        s["step"] = 8
+    if s.step == 7:
+        s.q7_correct = correct
+        s.step = 8
         next_diff = "hard" if correct else "easy"     # Q8
-        nq = _pop_from_pool(s["pools"], next_diff)
-        s["current"] = nq
+        nq = _next_from_pool(s.pools, s.cursors, next_diff)
+        s.current = nq
         return {"correct": correct, "done": False,
-                "question": {"text": nq["text"], "options": nq["options"], "difficulty": nq["difficulty"]}}
-
-    # s["step"] == 8  → this answer finishes the quiz
-    s["step"] = 9
-    s["current"] = None
-    total = 8
-    status = _status_after_phase2(total, s["score"])
-    return {"correct": correct, "done": True,
-            "total": total, "score": s["score"],
-            "unlock_next": True, "status": status}
+                "question": nq.payload}
+
+    # s.step == 8  → this answer finishes the quiz
+    s.step = 9
+    s.current = None
+    return {"correct": correct, **_FINISH[(8, s.score)]}
+
+@app.post("/quiz/answer")
+async def quiz_answer(req: QuizAnswer):
+    s = _session_get(req.session_id)
+    if not s: raise HTTPException(status_code=400, detail="Invalid session_id")
+    return _advance(s, req.answer)